@@ -0,0 +1,81 @@
+import re
+import sys
+import argparse
+import subprocess
+
+# Measures how long `import execution.<module>` takes using `python -X importtime`
+# and fails if any module exceeds the budget or pulls in a heavy SDK eagerly.
+
+MODULES = [
+    'get_recent_videos',
+    'extract_recommendations',
+    'create_slides',
+    'send_email',
+    'backtest_speakers',
+    'consolidate_recommendations',
+    'transcript_index',
+    'watch_daemon',
+]
+
+# Must only be loaded on first use, never at import time
+HEAVY_PACKAGES = [
+    'googleapiclient',
+    'google_auth_oauthlib',
+    'google.oauth2',
+    'google.genai',
+    'youtube_transcript_api',
+    'dotenv',
+    'numpy',
+    'pandas',
+]
+
+LINE = re.compile(r'^import time:\s+(\d+) \|\s+(\d+) \|( *)(\S+)')
+
+def measure(module, runs):
+    """Return (best cumulative microseconds, imported package names) across runs."""
+    best, names = None, set()
+    for _ in range(runs):
+        proc = subprocess.run(
+            [sys.executable, '-X', 'importtime', '-c', f'import execution.{module}'],
+            capture_output=True, text=True,
+        )
+        if proc.returncode != 0:
+            raise RuntimeError(f"import execution.{module} failed:\n{proc.stderr.strip().splitlines()[-1]}")
+        total = 0
+        for line in proc.stderr.splitlines():
+            m = LINE.match(line)
+            if not m:
+                continue
+            names.add(m.group(4))
+            # Top-level execution entries include everything they pulled in;
+            # interpreter startup (site, encodings) is excluded
+            if len(m.group(3)) == 1 and m.group(4).split('.')[0] == 'execution':
+                total += int(m.group(2))
+        best = total if best is None else min(best, total)
+    return best, names
+
+def main():
+    parser = argparse.ArgumentParser(description='Check import time of execution modules against a budget.')
+    parser.add_argument('--budget-ms', type=float, default=50, help='Maximum cumulative import time per module')
+    parser.add_argument('--runs', type=int, default=3, help='Take the best of this many runs')
+    args = parser.parse_args()
+
+    failures = []
+    print(f"{'module':<30} {'ms':>8}  heavy imports")
+    for module in MODULES:
+        micros, names = measure(module, args.runs)
+        heavy = sorted(p for p in HEAVY_PACKAGES if p in names)
+        ms = micros / 1000
+        print(f"{module:<30} {ms:>8.1f}  {', '.join(heavy) or '-'}")
+        if ms > args.budget_ms:
+            failures.append(f"{module}: {ms:.1f} ms exceeds {args.budget_ms:.0f} ms budget")
+        if heavy:
+            failures.append(f"{module}: imports {', '.join(heavy)} at import time")
+
+    if failures:
+        print("\n" + "\n".join(failures))
+        sys.exit(1)
+    print(f"\nAll modules within {args.budget_ms:.0f} ms budget.")
+
+if __name__ == "__main__":
+    main()
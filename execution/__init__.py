@@ -0,0 +1,5 @@
+"""
+Pipeline stages for the daily stock report. Each module is runnable with
+``python -m execution.<module>``. Importing a module is cheap: Google SDKs,
+Gemini clients and pandas are loaded on first use.
+"""
@@ -0,0 +1,228 @@
+import os
+import glob
+import json
+import argparse
+
+from .consolidate_recommendations import normalize_stock, normalize_speaker
+from .common import force_utf8_output
+
+HISTORY_PATH = 'data/recommendation_history.jsonl'
+PRICES_DIR = 'data/prices'
+TICKERS_PATH = 'data/tickers.json'
+SCORES_PATH = '.tmp/speaker_scores.json'
+HORIZONS = [1, 5, 20, 60]
+
+# Direction of the call: Buy profits when price rises, Sell when it falls.
+# Hold/Watch/Wait are not directional and are excluded from hit rates.
+ACTION_SIGN = {'buy': 1.0, 'sell': -1.0}
+
+# Regular-session close in UTC, used to enter on the first close strictly after
+# the video went live. KRX closes 15:30 KST; for US listings the DST close
+# (16:00 EDT = 20:00 UTC) is used year-round, which is never later than the real close.
+KR_SUFFIXES = ('.ks', '.kq')
+CLOSE_UTC_SECONDS = {'KR': 6 * 3600 + 30 * 60, 'US': 20 * 3600}
+
+# A call published before a ticker's price file starts is only scored if its
+# entry close is this close to publication (e.g. the file starts the next day)
+MAX_ENTRY_GAP_DAYS = 5
+
+def log(msg, debug=False):
+    if debug:
+        print(f"[DEBUG] {msg}")
+
+def normalize_name(name):
+    return "".join(str(name or "").split()).lower()
+
+def normalize_column(values, normalize):
+    """Run a Python normalizer once per distinct value and map the results back."""
+    import pandas as pd
+
+    uniques = pd.unique(values)
+    return values.map(pd.Series([normalize(u) for u in uniques], index=uniques))
+
+def ticker_market(ticker):
+    ticker = str(ticker).lower()
+    return 'KR' if ticker.endswith(KR_SUFFIXES) or ticker.isdigit() else 'US'
+
+def load_history(path):
+    import pandas as pd
+
+    history = pd.read_json(path, lines=True)
+    for col in ['video_id', 'stock_name', 'speaker', 'action', 'channel_title', 'published_at']:
+        if col not in history.columns:
+            history[col] = None
+    # Same stock and speaker normalization as the slide clusters
+    history['stock_key'] = normalize_column(history['stock_name'], normalize_stock)
+    history['speaker_key'] = normalize_column(history['speaker'], normalize_speaker)
+    # Overlapping runs may have recorded the same call more than once
+    key = pd.DataFrame({
+        'video_id': history['video_id'],
+        'published_at': history['published_at'],
+        'stock': history['stock_key'],
+        'speaker': history['speaker_key'],
+        'action': normalize_column(history['action'], normalize_name),
+    })
+    history = history[~key.duplicated()].copy()
+    # Keep the full UTC timestamp; truncating to a date lets a morning KST show
+    # (previous day in UTC) enter on a close that happened before it aired
+    history['published'] = pd.to_datetime(history['published_at'], utc=True, errors='coerce').dt.tz_localize(None)
+    # Report each speaker under the first spelling seen so scores line up with the slides
+    history['speaker'] = history['speaker'].fillna('Analyst').groupby(history['speaker_key']).transform('first')
+    history['channel_title'] = history['channel_title'].fillna('Unknown')
+    return history.dropna(subset=['published', 'stock_name'])
+
+def load_prices(prices_dir, debug=False):
+    """
+    Read one OHLC file per ticker (<TICKER>.csv or <TICKER>.parquet) and return
+    closing prices in long form (ticker, date, close), sorted by ticker then date.
+    Each ticker keeps only its own trading days, so KR and US holidays never mix.
+    """
+    import pandas as pd
+
+    frames = []
+    for path in sorted(glob.glob(os.path.join(prices_dir, '*.csv')) + glob.glob(os.path.join(prices_dir, '*.parquet'))):
+        ticker, ext = os.path.splitext(os.path.basename(path))
+        df = pd.read_parquet(path) if ext == '.parquet' else pd.read_csv(path)
+        df.columns = [c.lower() for c in df.columns]
+        close_col = 'adj close' if 'adj close' in df.columns else 'close'
+        frames.append(pd.DataFrame({
+            'ticker': ticker,
+            'date': pd.to_datetime(df['date']).dt.tz_localize(None).dt.normalize(),
+            'close': df[close_col].astype('float64'),
+        }))
+    if not frames:
+        return pd.DataFrame(columns=['ticker', 'date', 'close'])
+    log(f"Loaded price files for {len(frames)} tickers.", debug)
+    prices = pd.concat(frames, ignore_index=True).dropna(subset=['date', 'close'])
+    prices = prices.drop_duplicates(subset=['ticker', 'date'], keep='last')
+    return prices.sort_values(['ticker', 'date'], ignore_index=True)
+
+def load_ticker_map(path):
+    """Map normalized stock names to normalized price-file tickers; file stems always map to themselves."""
+    mapping = {}
+    if path and os.path.exists(path):
+        with open(path, 'r', encoding='utf-8') as f:
+            mapping = {normalize_stock(k): normalize_stock(v) for k, v in json.load(f).items()}
+    return mapping
+
+def forward_returns(history, prices, ticker_map, horizons=HORIZONS):
+    """
+    Attach signed forward returns for each horizon. The entry is the ticker's
+    first close strictly after the video was published and horizons count
+    that ticker's own trading days. Prices are laid out as one flat array sorted
+    by (ticker, date), so every lookup is a single searchsorted over all calls.
+    """
+    import numpy as np
+    import pandas as pd
+
+    result = history.copy()
+    # Rows are sorted by ticker, so factorized codes ascend with the row order
+    price_code, tickers = pd.factorize(prices['ticker'])
+    tickers = np.asarray(tickers)
+    codes = pd.Series(np.arange(len(tickers)), index=[normalize_stock(t) for t in tickers])
+    codes = codes[~codes.index.duplicated()]
+
+    names = normalize_column(result['stock_name'], normalize_stock)
+    resolved = names.map(ticker_map).fillna(names)
+    col = resolved.map(codes).to_numpy(dtype='float64')
+    matched = ~np.isnan(col)
+    col_i = np.where(matched, col, 0).astype(np.int64)
+
+    # Composite (ticker code, seconds) keys keep each ticker's dates contiguous
+    origin = prices['date'].min()
+    seconds = ((prices['date'] - origin).dt.total_seconds()).to_numpy(dtype=np.int64)
+    span = int(seconds.max()) + 2 * 86400
+    keys = price_code.astype(np.int64) * span + seconds
+    closes = prices['close'].to_numpy(dtype='float64')
+    segment_start = np.searchsorted(price_code, np.arange(len(tickers)), side='left')
+    segment_end = np.searchsorted(price_code, np.arange(len(tickers)), side='right')
+
+    # close(d) = d + close_offset > published  <=>  d > published - close_offset
+    close_offset = np.array([CLOSE_UTC_SECONDS[ticker_market(t)] for t in tickers], dtype='float64')
+    published = ((result['published'] - origin).dt.total_seconds()).to_numpy(dtype='float64')
+    query = published - close_offset[col_i]
+    # Clip into the ticker's own key range so a search never lands in a neighbour's segment
+    query = np.clip(np.nan_to_num(query, nan=span - 1), -1, span - 1).astype(np.int64)
+    entry_i = np.searchsorted(keys, col_i * span + query, side='right')
+    end = segment_end[col_i]
+
+    safe_entry = np.minimum(entry_i, len(closes) - 1)
+    # Without an earlier close in the file the entry may be months after the
+    # call, so require prior coverage or an entry right after publication
+    covered = entry_i > segment_start[col_i]
+    near_entry = (seconds[safe_entry] + close_offset[col_i] - published) <= MAX_ENTRY_GAP_DAYS * 86400
+    valid = matched & (entry_i < end) & (covered | near_entry)
+    entry = np.where(valid, closes[safe_entry], np.nan)
+    sign = result['action'].astype(str).str.lower().map(ACTION_SIGN).to_numpy(dtype='float64')
+
+    result['ticker'] = np.where(valid, tickers[col_i], None)
+    for h in horizons:
+        exit_i = entry_i + h
+        in_range = valid & (exit_i < end)
+        exit_price = np.where(in_range, closes[np.minimum(exit_i, len(closes) - 1)], np.nan)
+        raw = exit_price / entry - 1.0
+        result[f'ret_{h}d'] = raw
+        result[f'signed_{h}d'] = raw * sign
+        result[f'hit_{h}d'] = np.where(np.isnan(raw * sign), np.nan, (raw * sign > 0).astype('float64'))
+    return result
+
+def score(returns, by, horizons=HORIZONS):
+    """Aggregate calls, hit rates and mean signed returns per group."""
+    agg = {'calls': ('stock_name', 'size')}
+    for h in horizons:
+        agg[f'hit_rate_{h}d'] = (f'hit_{h}d', 'mean')
+        agg[f'avg_return_{h}d'] = (f'signed_{h}d', 'mean')
+        agg[f'scored_{h}d'] = (f'hit_{h}d', 'count')
+    table = returns.groupby(by, sort=False).agg(**agg)
+    return table.sort_values('calls', ascending=False)
+
+def to_records(table):
+    import pandas as pd
+
+    table = table.reset_index().astype(object)
+    return table.where(pd.notna(table), None).to_dict(orient='records')
+
+def main():
+    force_utf8_output()
+    parser = argparse.ArgumentParser(description='Backtest speaker and channel recommendations against local price files.')
+    parser.add_argument('--history', default=HISTORY_PATH, help='JSON Lines recommendation history')
+    parser.add_argument('--prices', default=PRICES_DIR, help='Directory of <TICKER>.csv/.parquet OHLC files')
+    parser.add_argument('--tickers', default=TICKERS_PATH, help='JSON map of stock name to ticker')
+    parser.add_argument('--horizons', default=",".join(map(str, HORIZONS)), help='Comma-separated forward horizons in trading days')
+    parser.add_argument('--output', default=SCORES_PATH, help='Where to write the scores JSON')
+    parser.add_argument('--debug', action='store_true', help='Enable debug logging')
+    args = parser.parse_args()
+    debug = args.debug
+
+    if not os.path.exists(args.history):
+        print(f"No recommendation history found at {args.history}.")
+        return
+
+    horizons = [int(h) for h in args.horizons.split(',') if h.strip()]
+    history = load_history(args.history)
+    prices = load_prices(args.prices, debug)
+    if prices.empty:
+        print(f"No price files found in {args.prices}.")
+        return
+
+    returns = forward_returns(history, prices, load_ticker_map(args.tickers), horizons)
+    matched = returns['ticker'].notna().sum()
+    log(f"Matched {matched}/{len(returns)} recommendations to price data.", debug)
+
+    speakers = score(returns, 'speaker', horizons)
+    channels = score(returns, 'channel_title', horizons)
+
+    os.makedirs(os.path.dirname(args.output) or '.', exist_ok=True)
+    with open(args.output, 'w', encoding='utf-8') as f:
+        json.dump({
+            'horizons': horizons,
+            'recommendations': int(len(returns)),
+            'matched': int(matched),
+            'speakers': to_records(speakers),
+            'channels': to_records(channels),
+        }, f, ensure_ascii=False, indent=2)
+
+    print(f"Scored {matched} of {len(returns)} recommendations. Saved to {args.output}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,6 @@
+import sys
+
+def force_utf8_output():
+    # Force UTF-8 encoding for stdout/stderr (Korean titles on Windows consoles)
+    sys.stdout.reconfigure(encoding='utf-8')
+    sys.stderr.reconfigure(encoding='utf-8')
@@ -0,0 +1,117 @@
+import os
+import re
+import json
+import argparse
+from collections import Counter
+
+from .common import force_utf8_output
+
+TICKERS_PATH = 'data/tickers.json'
+
+# Corporate-form noise that varies between clips of the same broadcast
+STOCK_NOISE = re.compile(r'\(주\)|㈜|주식회사|\binc\.?$|\bcorp\.?$|\bco\.?,? ?ltd\.?$', re.IGNORECASE)
+
+def log(msg, debug=False):
+    if debug:
+        print(f"[DEBUG] {msg}")
+
+def normalize_stock(name):
+    name = STOCK_NOISE.sub('', str(name or '').strip())
+    return "".join(name.split()).lower()
+
+def normalize_speaker(name):
+    return "".join(str(name or 'Analyst').split()).lower()
+
+def load_aliases(path=TICKERS_PATH):
+    """Stock-name -> ticker map (shared with backtest_speakers.py) used to merge spelling variants."""
+    if not path or not os.path.exists(path):
+        return {}
+    with open(path, 'r', encoding='utf-8') as f:
+        return {normalize_stock(k): normalize_stock(v) for k, v in json.load(f).items()}
+
+def consolidate(recommendations, aliases=None):
+    """
+    Cluster recommendations by (normalized stock, normalized speaker) across all
+    videos in a single pass. Each cluster keeps the first-seen display fields,
+    de-duplicated reasoning and the list of source videos. When the calls
+    disagree the action lists every one, most frequent first (e.g. "Buy/Sell"),
+    so a reversal stays visible. Clusters are returned with the most widely
+    repeated calls first.
+    """
+    aliases = aliases or {}
+    clusters = {}
+    for rec in recommendations:
+        stock_key = normalize_stock(rec.get('stock_name'))
+        stock_key = aliases.get(stock_key, stock_key)
+        key = (stock_key, normalize_speaker(rec.get('speaker')))
+
+        cluster = clusters.get(key)
+        if cluster is None:
+            cluster = clusters[key] = {
+                # Gemini JSON may carry explicit nulls, so default with `or`
+                'stock_name': rec.get('stock_name') or 'N/A',
+                'market': rec.get('market') or '',
+                'speaker': rec.get('speaker') or 'Analyst',
+                'actions': Counter(),
+                'action_labels': {},
+                'reasons': {},
+                'sources': {},
+            }
+        if not cluster['market'] and rec.get('market'):
+            cluster['market'] = rec['market']
+        action = str(rec.get('action') or 'N/A').strip()
+        # Count by lower case so "buy" and "Buy" are not reported as mixed
+        cluster['actions'][action.lower()] += 1
+        cluster['action_labels'].setdefault(action.lower(), action)
+        reason = (rec.get('reasoning') or '').strip()
+        if reason:
+            cluster['reasons'].setdefault("".join(reason.split()).lower(), reason)
+        v_id = rec.get('video_id') or 'unknown'
+        if v_id not in cluster['sources']:
+            cluster['sources'][v_id] = {
+                'video_id': v_id,
+                'video_title': rec.get('video_title') or 'Unknown Video',
+                'time_context': rec.get('time_context') or 'General',
+            }
+
+    consolidated = []
+    for cluster in clusters.values():
+        consolidated.append({
+            'stock_name': cluster['stock_name'],
+            'market': cluster['market'],
+            'speaker': cluster['speaker'],
+            'action': "/".join(cluster['action_labels'][a] for a, _ in cluster['actions'].most_common()),
+            'mixed_action': len(cluster['actions']) > 1,
+            'reasoning': " / ".join(cluster['reasons'].values()),
+            'mentions': sum(cluster['actions'].values()),
+            'sources': list(cluster['sources'].values()),
+        })
+    consolidated.sort(key=lambda c: (len(c['sources']), c['mentions']), reverse=True)
+    return consolidated
+
+def main():
+    force_utf8_output()
+    parser = argparse.ArgumentParser(description='Consolidate recommendations across videos by stock and speaker.')
+    parser.add_argument('--input', default='.tmp/analysis_results.json', help='Per-video recommendations')
+    parser.add_argument('--output', default='.tmp/consolidated_results.json', help='Where to write the clusters')
+    parser.add_argument('--tickers', default=TICKERS_PATH, help='JSON map of stock name to ticker for merging aliases')
+    parser.add_argument('--debug', action='store_true', help='Enable debug logging')
+    args = parser.parse_args()
+
+    if not os.path.exists(args.input):
+        print(f"No recommendations found at {args.input}.")
+        return
+
+    with open(args.input, 'r', encoding='utf-8') as f:
+        recommendations = json.load(f)
+
+    consolidated = consolidate(recommendations, load_aliases(args.tickers))
+    log(f"Merged {len(recommendations)} recommendations into {len(consolidated)} clusters.", args.debug)
+
+    os.makedirs(os.path.dirname(args.output) or '.', exist_ok=True)
+    with open(args.output, 'w', encoding='utf-8') as f:
+        json.dump(consolidated, f, ensure_ascii=False, indent=2)
+    print(f"Consolidated {len(recommendations)} recommendations into {len(consolidated)} entries.")
+
+if __name__ == "__main__":
+    main()
@@ -1,24 +1,51 @@
 import os
-import sys
 import json
 import datetime
 import argparse
 
-# Force UTF-8 encoding for stdout/stderr
-sys.stdout.reconfigure(encoding='utf-8')
-sys.stderr.reconfigure(encoding='utf-8')
-from googleapiclient.discovery import build
-from google.oauth2.credentials import Credentials
-from google_auth_oauthlib.flow import InstalledAppFlow
-from google.auth.transport.requests import Request
+from . import consolidate_recommendations
+
+from .common import force_utf8_output
 
 SCOPES = ['https://www.googleapis.com/auth/presentations', 'https://www.googleapis.com/auth/drive']
 
+PRESENTATION_TITLE = "3pro TV Stock Analysis Report"
+CHANNELS = ["삼프로TV", "언더스탠딩", "와이스트릿"]
+ITEMS_PER_PAGE = 5
+RETENTION_DAYS = 30
+SCORES_PATH = '.tmp/speaker_scores.json'
+TRACK_RECORD_HORIZON = 20
+TRACK_RECORD_LINES = 5
+
+# RGB Values (normalized 0-1)
+RGB_BG = {'red': 0.11, 'green': 0.11, 'blue': 0.11} # #1C1C1C
+RGB_TITLE = {'red': 1.0, 'green': 1.0, 'blue': 1.0} # White
+RGB_ACCENT = {'red': 0.29, 'green': 0.61, 'blue': 1.0} # #4B9BFF
+RGB_TEXT = {'red': 0.8, 'green': 0.8, 'blue': 0.8} # Light Gray
+
+# Action Icons
+ICONS = {"Buy": "🚀", "Sell": "📉", "Hold": "⚖️", "Wait": "⏳", "Watch": "👀"}
+MIXED_ICON = "🔄"  # consolidated calls that disagree, e.g. "Buy/Sell"
+
 def log(msg, debug=False):
     if debug:
         print(f"[DEBUG] {msg}")
 
+# Helper for Solid Fill (Background)
+def solid_fill(rgb): return {'solidFill': {'color': {'rgbColor': rgb}}}
+
+# Helper for Opaque Color (Text)
+def text_style(rgb, bold=False, size=None):
+    style = {'foregroundColor': {'opaqueColor': {'rgbColor': rgb}}, 'bold': bold}
+    if size: style['fontSize'] = {'magnitude': size, 'unit': 'PT'}
+    return style
+
 def get_services(debug=False):
+    from googleapiclient.discovery import build
+    from google.oauth2.credentials import Credentials
+    from google_auth_oauthlib.flow import InstalledAppFlow
+    from google.auth.transport.requests import Request
+
     log("Initializing Google API Services...", debug)
     creds = None
     if os.path.exists('token_slides.json'):
@@ -36,31 +63,13 @@ def get_services(debug=False):
             creds = flow.run_local_server(port=0)
         with open('token_slides.json', 'w') as token:
             token.write(creds.to_json())
-    
+
     slides_service = build('slides', 'v1', credentials=creds)
     drive_service = build('drive', 'v3', credentials=creds)
     return slides_service, drive_service
 
-def main():
-    parser = argparse.ArgumentParser(description='Create Google Slides.')
-    parser.add_argument('--debug', action='store_true', help='Enable debug logging')
-    args = parser.parse_args()
-    debug = args.debug
-
-    log("Script started.", debug)
-
-    # 1. Load analysis results
-    recommendations = []
-    if os.path.exists('.tmp/analysis_results.json'):
-        with open('.tmp/analysis_results.json', 'r', encoding='utf-8') as f:
-            recommendations = json.load(f)
-
-    # 2. Setup Google Services
-    service, drive_service = get_services(debug)
-
-    # 3. Handle Presentation ID (Existing or New)
+def find_or_create_presentation(service, drive_service, debug=False):
     presentation_id = None
-    presentation_title = "3pro TV Stock Analysis Report"
 
     # Try 1: Check local persistence (works for local machine)
     if os.path.exists('.tmp/slide_link.json'):
@@ -76,8 +85,8 @@ def main():
     # Try 2: Search by title on Google Drive (essential for GitHub Actions)
     if not presentation_id:
         try:
-            log(f"Searching for presentation named '{presentation_title}' on Google Drive...", debug)
-            query = f"name = '{presentation_title}' and mimeType = 'application/vnd.google-apps.presentation' and trashed = false"
+            log(f"Searching for presentation named '{PRESENTATION_TITLE}' on Google Drive...", debug)
+            query = f"name = '{PRESENTATION_TITLE}' and mimeType = 'application/vnd.google-apps.presentation' and trashed = false"
             results = drive_service.files().list(q=query, fields="files(id, name)").execute()
             files = results.get('files', [])
             if files:
@@ -87,212 +96,300 @@ def main():
             log(f"Error searching for presentation: {e}", debug)
 
     if not presentation_id:
-        presentation = service.presentations().create(body={'title': presentation_title}).execute()
+        presentation = service.presentations().create(body={'title': PRESENTATION_TITLE}).execute()
         presentation_id = presentation.get('presentationId')
         log(f"Created new presentation: {presentation_id}", debug)
+    return presentation_id
+
+def create_slide_requests(slide_id, insertion_index):
+    return [
+        {
+            'createSlide': {
+                'objectId': slide_id,
+                'insertionIndex': insertion_index,
+                'slideLayoutReference': {'predefinedLayout': 'TITLE_AND_BODY'}
+            }
+        },
+        {
+            'updatePageProperties': {
+                'objectId': slide_id,
+                'pageProperties': {'pageBackgroundFill': solid_fill(RGB_BG)},
+                'fields': 'pageBackgroundFill'
+            }
+        },
+    ]
+
+def get_placeholders(slide_obj):
+    t_id, b_id = None, None
+    for element in slide_obj.get('pageElements', []):
+        if 'shape' in element and 'placeholder' in element['shape']:
+            p_type = element['shape']['placeholder']['type']
+            if p_type == 'TITLE': t_id = element['objectId']
+            elif p_type == 'BODY': b_id = element['objectId']
+    return t_id, b_id
+
+def group_by_video(recommendations):
+    grouped_recs = {}
+    for rec in recommendations:
+        v_id = rec.get('video_id', 'unknown')
+        if v_id not in grouped_recs:
+            grouped_recs[v_id] = {
+                'video_title': rec.get('video_title') or 'Unknown Video',
+                'items': []
+            }
+        grouped_recs[v_id]['items'].append(rec)
+    return grouped_recs
+
+def group_by_stock(recommendations):
+    """Single consolidated group spanning every video, most repeated calls first."""
+    aliases = consolidate_recommendations.load_aliases()
+    items = consolidate_recommendations.consolidate(recommendations, aliases)
+    return {'consolidated': {'video_title': 'Top Picks Across Videos', 'items': items}}
+
+def plan_video_slides(recommendations, now, insertion_index=1, prefix='v_rec', view='video'):
+    """
+    Build createSlide requests for recommendation slides grouped per video (or
+    consolidated per stock), splitting into multiple pages if many items.
+    Returns (requests, [(slide_id, data)]).
+    """
+    requests = []
+    new_slides = []
+    grouped_recs = group_by_stock(recommendations) if view == 'stock' else group_by_video(recommendations)
+    for i, (v_id, data) in enumerate(reversed(list(grouped_recs.items()))):
+        items = data['items']
+        # Split items into chunks
+        chunks = [items[j:j + ITEMS_PER_PAGE] for j in range(0, len(items), ITEMS_PER_PAGE)]
+
+        # Reverse the chunks so that when we insert at the same index, the first chunk ends up at the top
+        for chunk_idx, chunk in reversed(list(enumerate(chunks))):
+            suffix = f" ({chunk_idx + 1}/{len(chunks)})" if len(chunks) > 1 else ""
+            slide_id = f'{prefix}_{i}_{chunk_idx}_{now.strftime("%H%M%S")}'
+            requests.extend(create_slide_requests(slide_id, insertion_index))
+            new_slides.append((slide_id, {
+                'video_title': data['video_title'] + suffix,
+                'items': chunk
+            }))
+    return requests, new_slides
+
+def recommendation_text_requests(slides, new_slides):
+    text_requests = []
+    for slide_id, data in new_slides:
+        target_slide = next(s for s in slides if s['objectId'] == slide_id)
+        t_id, b_id = get_placeholders(target_slide)
+
+        if t_id:
+            clean_title = data['video_title']
+            if len(clean_title) > 70: clean_title = clean_title[:67] + "..."
+            text_requests.append({'insertText': {'objectId': t_id, 'text': clean_title}})
+            text_requests.append({'updateTextStyle': {'objectId': t_id, 'style': text_style(RGB_ACCENT, True, 16), 'fields': 'foregroundColor,bold,fontSize'}})
+
+        if b_id:
+            body_content = ""
+            for item in data['items']:
+                action = str(item.get('action') or 'N/A')
+                icon = MIXED_ICON if item.get('mixed_action') else ICONS.get(action, "📌")
+                market = f"[{item['market']}]" if item.get('market') else ""
+                stock = item.get('stock_name') or 'N/A'
+                sources = item.get('sources') or []
+                repeated = f" ×{len(sources)} videos" if len(sources) > 1 else ""
+                body_content += f"{icon} {stock} {market} ({action}){repeated}\n"
+
+                reason = item.get('reasoning') or ''
+                if len(reason) > 110: reason = reason[:107] + "..."
+                body_content += f"      └ {reason} [{item.get('speaker') or 'Analyst'}]\n"
+
+                if sources:
+                    # Consolidated items span videos, so name where the call came from
+                    source = sources[0].get('video_title') or 'Unknown Video'
+                    if len(source) > 60: source = source[:57] + "..."
+                    more = f" (+{len(sources) - 1} more)" if len(sources) > 1 else ""
+                    body_content += f"      ▸ {source}{more}\n"
+
+            text_requests.append({'insertText': {'objectId': b_id, 'text': body_content}})
+            text_requests.append({'updateTextStyle': {'objectId': b_id, 'style': text_style(RGB_TEXT, False, 10), 'fields': 'foregroundColor,fontSize'}})
+    return text_requests
+
+def load_track_record(recommendations, path=SCORES_PATH):
+    """
+    Summarize backtested hit rates (from backtest_speakers.py) for the speakers
+    featured in this report. Returns an empty string when no scores exist.
+    """
+    if not recommendations or not os.path.exists(path):
+        return ""
+    with open(path, 'r', encoding='utf-8') as f:
+        scores = json.load(f)
+    horizons = scores.get('horizons', [])
+    if not horizons:
+        return ""
+    h = TRACK_RECORD_HORIZON if TRACK_RECORD_HORIZON in horizons else horizons[-1]
+
+    featured = {consolidate_recommendations.normalize_speaker(r.get('speaker')) for r in recommendations}
+    rows = [
+        s for s in scores.get('speakers', [])
+        if consolidate_recommendations.normalize_speaker(s.get('speaker')) in featured and s.get(f'hit_rate_{h}d') is not None
+    ]
+    rows.sort(key=lambda s: s.get(f'scored_{h}d') or 0, reverse=True)
+    lines = [
+        f"{s['speaker']}: {s[f'hit_rate_{h}d'] * 100:.0f}% hit, {s[f'avg_return_{h}d'] * 100:+.1f}% avg (n={s[f'scored_{h}d']})"
+        for s in rows[:TRACK_RECORD_LINES]
+    ]
+    if not lines:
+        return ""
+    return f"\nTrack record ({h}d): " + " | ".join(lines)
+
+def summary_text_requests(summary_slide, summary_title, status, track_record=""):
+    text_requests = []
+    t_id, b_id = get_placeholders(summary_slide)
+    if t_id:
+        text_requests.append({'insertText': {'objectId': t_id, 'text': summary_title}})
+        text_requests.append({'updateTextStyle': {'objectId': t_id, 'style': text_style(RGB_ACCENT, True, 36), 'fields': 'foregroundColor,bold,fontSize'}})
+    if b_id:
+        # Add extra newlines at the start to push content down and avoid overlap with title
+        status_text = f"\n\nChannels: {', '.join(CHANNELS)}\nStatus: {status}{track_record}"
+        text_requests.append({'insertText': {'objectId': b_id, 'text': status_text}})
+        text_requests.append({'updateTextStyle': {'objectId': b_id, 'style': text_style(RGB_TEXT, False, 18), 'fields': 'foregroundColor,fontSize'}})
+    return text_requests
+
+def append_video_slides(service, presentation_id, recommendations, after_slide_id, now, debug=False):
+    """
+    Insert per-video slides for new recommendations directly below an existing
+    summary slide. Used by the watch daemon to grow the current day's report.
+    """
+    pres = service.presentations().get(presentationId=presentation_id).execute()
+    slide_ids = [s['objectId'] for s in pres.get('slides', [])]
+    insertion_index = slide_ids.index(after_slide_id) + 1 if after_slide_id in slide_ids else 1
+
+    requests, new_slides = plan_video_slides(recommendations, now, insertion_index, prefix=f'v_live_{now.strftime("%Y%m%d")}')
+    if not requests:
+        return []
+    log(f"Appending {len(new_slides)} slides at index {insertion_index}...", debug)
+    service.presentations().batchUpdate(presentationId=presentation_id, body={'requests': requests}).execute()
+
+    pres = service.presentations().get(presentationId=presentation_id).execute()
+    text_requests = recommendation_text_requests(pres.get('slides', []), new_slides)
+    if text_requests:
+        service.presentations().batchUpdate(presentationId=presentation_id, body={'requests': text_requests}).execute()
+    return [slide_id for slide_id, _ in new_slides]
+
+def add_summary_slide(service, presentation_id, now, status, debug=False):
+    """Insert a standalone summary slide at the top of the deck and return its id."""
+    summary_id = f'summary_{now.strftime("%Y%m%d")}_{now.strftime("%H%M%S")}'
+    summary_title = f"Report: {now.strftime('%Y-%m-%d')} {now.strftime('%H:%M:%S')}"
+    log(f"Creating summary slide {summary_id}...", debug)
+    service.presentations().batchUpdate(presentationId=presentation_id, body={'requests': create_slide_requests(summary_id, 0)}).execute()
+    pres = service.presentations().get(presentationId=presentation_id).execute()
+    summary_slide = next(s for s in pres.get('slides', []) if s['objectId'] == summary_id)
+    text_requests = summary_text_requests(summary_slide, summary_title, status)
+    if text_requests:
+        service.presentations().batchUpdate(presentationId=presentation_id, body={'requests': text_requests}).execute()
+    return summary_id
+
+def apply_retention(service, presentation_id, debug=False):
+    # Retention Policy: Keep only last 30 daily reports
+    log(f"Checking retention policy ({RETENTION_DAYS} days)...", debug)
+    pres = service.presentations().get(presentationId=presentation_id).execute()
+    current_slides = pres.get('slides', [])
+
+    summary_indices = []
+    for i, s in enumerate(current_slides):
+        # We identify summary slides by their objectId prefix
+        if s['objectId'].startswith('summary_'):
+            summary_indices.append(i)
+
+    if len(summary_indices) > RETENTION_DAYS:
+        delete_from_index = summary_indices[RETENTION_DAYS]
+        log(f"Retention: Deleting slides from index {delete_from_index} onwards.", debug)
+        delete_requests = []
+        for s in current_slides[delete_from_index:]:
+            delete_requests.append({'deleteObject': {'objectId': s['objectId']}})
+        if delete_requests:
+            service.presentations().batchUpdate(presentationId=presentation_id, body={'requests': delete_requests}).execute()
+
+def save_link(presentation_id):
+    presentation_url = f"https://docs.google.com/presentation/d/{presentation_id}/edit"
+    print(f"Slides updated: {presentation_url}")
+    os.makedirs('.tmp', exist_ok=True)
+    with open('.tmp/slide_link.json', 'w', encoding='utf-8') as f:
+        json.dump({"url": presentation_url, "id": presentation_id, "title": PRESENTATION_TITLE}, f)
+    return presentation_url
+
+def main():
+    force_utf8_output()
+    parser = argparse.ArgumentParser(description='Create Google Slides.')
+    parser.add_argument('--view', choices=['stock', 'video'], default='stock', help='Consolidate across videos per stock/speaker, or one group per video')
+    parser.add_argument('--debug', action='store_true', help='Enable debug logging')
+    args = parser.parse_args()
+    debug = args.debug
+
+    log("Script started.", debug)
+
+    # 1. Load analysis results
+    recommendations = []
+    if os.path.exists('.tmp/analysis_results.json'):
+        with open('.tmp/analysis_results.json', 'r', encoding='utf-8') as f:
+            recommendations = json.load(f)
+
+    # 2. Setup Google Services
+    service, drive_service = get_services(debug)
+
+    # 3. Handle Presentation ID (Existing or New)
+    presentation_id = find_or_create_presentation(service, drive_service, debug)
 
     # 4. Prepare Metadata
     now = datetime.datetime.now()
     date_str = now.strftime("%Y-%m-%d")
     time_str = now.strftime("%H:%M:%S")
-    channels = ["삼프로TV", "언더스탠딩", "와이스트릿"]
     summary_title = f"Report: {date_str} {time_str}"
 
     # 5. Batch Update Requests (Insert at Top with Styling)
-    requests = []
-    
-    # RGB Values (normalized 0-1)
-    RGB_BG = {'red': 0.11, 'green': 0.11, 'blue': 0.11} # #1C1C1C
-    RGB_TITLE = {'red': 1.0, 'green': 1.0, 'blue': 1.0} # White
-    RGB_ACCENT = {'red': 0.29, 'green': 0.61, 'blue': 1.0} # #4B9BFF
-    RGB_TEXT = {'red': 0.8, 'green': 0.8, 'blue': 0.8} # Light Gray
-
-    # Helper for Solid Fill (Background)
-    def solid_fill(rgb): return {'solidFill': {'color': {'rgbColor': rgb}}}
-    
-    # Helper for Opaque Color (Text)
-    def text_style(rgb, bold=False, size=None):
-        style = {'foregroundColor': {'opaqueColor': {'rgbColor': rgb}}, 'bold': bold}
-        if size: style['fontSize'] = {'magnitude': size, 'unit': 'PT'}
-        return style
-
     # A. Create Summary Slide
     summary_id = f'summary_{date_str.replace("-","")}_{now.strftime("%H%M%S")}'
-    requests.append({
-        'createSlide': {
-            'objectId': summary_id,
-            'insertionIndex': 0,
-            'slideLayoutReference': {'predefinedLayout': 'TITLE_AND_BODY'}
-        }
-    })
-    # Set Summary Background
-    requests.append({
-        'updatePageProperties': {
-            'objectId': summary_id,
-            'pageProperties': {'pageBackgroundFill': solid_fill(RGB_BG)},
-            'fields': 'pageBackgroundFill'
-        }
-    })
-    
+    requests = create_slide_requests(summary_id, 0)
+
     # B. Add Recommendation Slides (or No Result slide)
     new_slide_ids = []
     if not recommendations:
         no_data_id = f'no_data_{now.strftime("%H%M%S")}'
-        requests.append({
-            'createSlide': {
-                'objectId': no_data_id,
-                'insertionIndex': 1,
-                'slideLayoutReference': {'predefinedLayout': 'TITLE_AND_BODY'}
-            }
-        })
-        requests.append({
-            'updatePageProperties': {
-                'objectId': no_data_id,
-                'pageProperties': {'pageBackgroundFill': solid_fill(RGB_BG)},
-                'fields': 'pageBackgroundFill'
-            }
-        })
+        requests.extend(create_slide_requests(no_data_id, 1))
         new_slide_ids.append(no_data_id)
     else:
-        # Group recommendations by video_id
-        grouped_recs = {}
-        for rec in recommendations:
-            v_id = rec.get('video_id', 'unknown')
-            if v_id not in grouped_recs:
-                grouped_recs[v_id] = {
-                    'video_title': rec.get('video_title', 'Unknown Video'),
-                    'items': []
-                }
-            grouped_recs[v_id]['items'].append(rec)
-
-        # Create slides per video, splitting into multiple pages if many items
-        ITEMS_PER_PAGE = 5
-        for i, (v_id, data) in enumerate(reversed(list(grouped_recs.items()))):
-            items = data['items']
-            # Split items into chunks
-            chunks = [items[j:j + ITEMS_PER_PAGE] for j in range(0, len(items), ITEMS_PER_PAGE)]
-            
-            # Reverse the chunks so that when we insert at index 1, the first chunk ends up at the top
-            for chunk_idx, chunk in reversed(list(enumerate(chunks))):
-                suffix = f" ({chunk_idx + 1}/{len(chunks)})" if len(chunks) > 1 else ""
-                slide_id = f'v_rec_{i}_{chunk_idx}_{now.strftime("%H%M%S")}'
-                requests.append({
-                    'createSlide': {
-                        'objectId': slide_id,
-                        'insertionIndex': 1,
-                        'slideLayoutReference': {'predefinedLayout': 'TITLE_AND_BODY'}
-                    }
-                })
-                requests.append({
-                    'updatePageProperties': {
-                        'objectId': slide_id,
-                        'pageProperties': {'pageBackgroundFill': solid_fill(RGB_BG)},
-                        'fields': 'pageBackgroundFill'
-                    }
-                })
-                new_slide_ids.append((slide_id, {
-                    'video_title': data['video_title'] + suffix,
-                    'items': chunk
-                }))
+        video_requests, new_slide_ids = plan_video_slides(recommendations, now, view=args.view)
+        requests.extend(video_requests)
 
     # Execute Slide Creation
     log("Creating new slides with premium theme...", debug)
     response = service.presentations().batchUpdate(presentationId=presentation_id, body={'requests': requests}).execute()
-    
+
     # 6. Populate Content & Style Text
-    text_requests = []
     pres = service.presentations().get(presentationId=presentation_id).execute()
     slides = pres.get('slides', [])
-    
-    def get_placeholders(slide_obj):
-        t_id, b_id = None, None
-        for element in slide_obj.get('pageElements', []):
-            if 'shape' in element and 'placeholder' in element['shape']:
-                p_type = element['shape']['placeholder']['type']
-                if p_type == 'TITLE': t_id = element['objectId']
-                elif p_type == 'BODY': b_id = element['objectId']
-        return t_id, b_id
 
     # Populate Summary
     summary_slide = next(s for s in slides if s['objectId'] == summary_id)
-    t_id, b_id = get_placeholders(summary_slide)
-    if t_id: 
-        text_requests.append({'insertText': {'objectId': t_id, 'text': summary_title}})
-        text_requests.append({'updateTextStyle': {'objectId': t_id, 'style': text_style(RGB_ACCENT, True, 36), 'fields': 'foregroundColor,bold,fontSize'}})
-    if b_id: 
-        # Add extra newlines at the start to push content down and avoid overlap with title
-        status_text = f"\n\nChannels: {', '.join(channels)}\nStatus: {'Success - Recommendations found' if recommendations else 'No data found'}"
-        text_requests.append({'insertText': {'objectId': b_id, 'text': status_text}})
-        text_requests.append({'updateTextStyle': {'objectId': b_id, 'style': text_style(RGB_TEXT, False, 18), 'fields': 'foregroundColor,fontSize'}})
+    status = 'Success - Recommendations found' if recommendations else 'No data found'
+    text_requests = summary_text_requests(summary_slide, summary_title, status, load_track_record(recommendations))
 
     # Populate Recommendations or No Data
     if not recommendations:
         no_data_slide = next(s for s in slides if s['objectId'] == new_slide_ids[0])
         t_id, b_id = get_placeholders(no_data_slide)
-        if t_id: 
+        if t_id:
             text_requests.append({'insertText': {'objectId': t_id, 'text': "Today's Result"}})
             text_requests.append({'updateTextStyle': {'objectId': t_id, 'style': text_style(RGB_TITLE, True), 'fields': 'foregroundColor,bold'}})
-        if b_id: 
+        if b_id:
             text_requests.append({'insertText': {'objectId': b_id, 'text': "조건에 맞는 추천 종목이 없습니다."}})
             text_requests.append({'updateTextStyle': {'objectId': b_id, 'style': text_style(RGB_TEXT), 'fields': 'foregroundColor'}})
     else:
-        # Action Icons
-        icons = {"Buy": "🚀", "Sell": "📉", "Hold": "⚖️", "Wait": "⏳", "Watch": "👀"}
-
-        for slide_id, data in new_slide_ids:
-            target_slide = next(s for s in slides if s['objectId'] == slide_id)
-            t_id, b_id = get_placeholders(target_slide)
-            
-            if t_id:
-                clean_title = data['video_title']
-                if len(clean_title) > 70: clean_title = clean_title[:67] + "..."
-                text_requests.append({'insertText': {'objectId': t_id, 'text': clean_title}})
-                text_requests.append({'updateTextStyle': {'objectId': t_id, 'style': text_style(RGB_ACCENT, True, 16), 'fields': 'foregroundColor,bold,fontSize'}})
-            
-            if b_id:
-                body_content = ""
-                for item in data['items']:
-                    action = item.get('action', 'N/A')
-                    icon = icons.get(action, "📌")
-                    market = f"[{item.get('market', '')}]" if item.get('market') else ""
-                    stock = item.get('stock_name', 'N/A')
-                    body_content += f"{icon} {stock} {market} ({action})\n"
-                    
-                    reason = item.get('reasoning', '')
-                    if len(reason) > 110: reason = reason[:107] + "..."
-                    body_content += f"      └ {reason} [{item.get('speaker', 'Analyst')}]\n"
-                
-                text_requests.append({'insertText': {'objectId': b_id, 'text': body_content}})
-                text_requests.append({'updateTextStyle': {'objectId': b_id, 'style': text_style(RGB_TEXT, False, 10), 'fields': 'foregroundColor,fontSize'}})
+        text_requests.extend(recommendation_text_requests(slides, new_slide_ids))
 
     if text_requests:
         service.presentations().batchUpdate(presentationId=presentation_id, body={'requests': text_requests}).execute()
 
-    # 7. Retention Policy: Keep only last 30 daily reports
-    log("Checking retention policy (30 days)...", debug)
-    pres = service.presentations().get(presentationId=presentation_id).execute()
-    current_slides = pres.get('slides', [])
-    
-    summary_indices = []
-    for i, s in enumerate(current_slides):
-        # We identify summary slides by their objectId prefix
-        if s['objectId'].startswith('summary_'):
-            summary_indices.append(i)
-    
-    if len(summary_indices) > 30:
-        delete_from_index = summary_indices[30]
-        log(f"Retention: Deleting slides from index {delete_from_index} onwards.", debug)
-        delete_requests = []
-        for s in current_slides[delete_from_index:]:
-            delete_requests.append({'deleteObject': {'objectId': s['objectId']}})
-        if delete_requests:
-            service.presentations().batchUpdate(presentationId=presentation_id, body={'requests': delete_requests}).execute()
+    # 7. Retention Policy
+    apply_retention(service, presentation_id, debug)
 
     # 8. Save/Update link
-    presentation_url = f"https://docs.google.com/presentation/d/{presentation_id}/edit"
-    print(f"Slides updated: {presentation_url}")
-    with open('.tmp/slide_link.json', 'w', encoding='utf-8') as f:
-        json.dump({"url": presentation_url, "id": presentation_id, "title": "3pro TV Stock Analysis Report"}, f)
+    save_link(presentation_id)
 
 if __name__ == "__main__":
     main()
@@ -1,27 +1,37 @@
 import os
-import sys
 import json
 import argparse
 import time
-from youtube_transcript_api import YouTubeTranscriptApi
-from dotenv import load_dotenv
-from google import genai
-from google.genai import types
 
-# Force UTF-8 encoding for stdout/stderr
-sys.stdout.reconfigure(encoding='utf-8')
-sys.stderr.reconfigure(encoding='utf-8')
+from . import transcript_index
+from .common import force_utf8_output
 
-load_dotenv()
+HISTORY_PATH = 'data/recommendation_history.jsonl'
+
+class RateLimitError(Exception):
+    """Gemini kept answering 429 after every retry."""
 
 def log(msg, debug=False):
     if debug:
         print(f"[DEBUG] {msg}")
 
-# Setup Gemini with new SDK
-client = genai.Client(api_key=os.environ.get("GEMINI_API_KEY"))
+_client = None
+
+def get_client():
+    """Create the Gemini client (new SDK) on first use and reuse it afterwards."""
+    global _client
+    if _client is None:
+        from dotenv import load_dotenv
+        from google import genai
+
+        load_dotenv()
+        _client = genai.Client(api_key=os.environ.get("GEMINI_API_KEY"))
+    return _client
+
+def get_transcript_segments(video_id, debug=False):
+    """Return [{'start', 'duration', 'text'}, ...] for a video, or None if unavailable."""
+    from youtube_transcript_api import YouTubeTranscriptApi
 
-def get_transcript(video_id, debug=False):
     try:
         log(f"Fetching transcript for video ID: {video_id}", debug)
         try:
@@ -33,9 +43,9 @@ def get_transcript(video_id, debug=False):
             except:
                 t = next(iter(transcript_list))
             data = t.fetch()
-            text = " ".join([i.text for i in data])
-            log(f"Transcript fetched successfully ({len(text)} chars)", debug)
-            return text
+            segments = [{'start': i.start, 'duration': i.duration, 'text': i.text} for i in data]
+            log(f"Transcript fetched successfully ({len(segments)} segments)", debug)
+            return segments
         except Exception as e:
             log(f"Transcript retrieval failed: {e}", debug)
             return None
@@ -43,7 +53,19 @@ def get_transcript(video_id, debug=False):
         log(f"Error in get_transcript: {e}", debug)
         return None
 
-def analyze_transcript(text, video_title, debug=False):
+def join_segments(segments):
+    return " ".join([s['text'] for s in segments]) if segments else None
+
+def get_transcript(video_id, debug=False):
+    return join_segments(get_transcript_segments(video_id, debug))
+
+def request_recommendations(text, video_title, debug=False):
+    """
+    Ask Gemini for recommendations. Returns a list (possibly empty) on success
+    and None when the request failed, so callers can retry instead of treating
+    an outage as "no recommendations". Raises RateLimitError if every attempt
+    was rate limited, since the next video would fail the same way.
+    """
     log(f"Analyzing content with Gemini for: {video_title}", debug)
     prompt = f"""
     Analyze the following YouTube video content titled "{video_title}".
@@ -64,7 +86,11 @@ def analyze_transcript(text, video_title, debug=False):
     {text[:300000]} 
     """ 
 
+    from google.genai import types
+
+    client = get_client()
     max_retries = 3
+    rate_limited = False
     for attempt in range(max_retries):
         try:
             log(f"Sending request to Gemini (gemini-flash-latest) - Attempt {attempt+1}...", debug)
@@ -81,7 +107,8 @@ def analyze_transcript(text, video_title, debug=False):
             return result_json.get("recommendations", [])
             
         except Exception as e:
-            if "429" in str(e):
+            rate_limited = "429" in str(e)
+            if rate_limited:
                 wait_time = 20 * (attempt + 1)
                 log(f"Rate limited (429). Waiting {wait_time}s and retrying...", debug)
                 time.sleep(wait_time)
@@ -89,10 +116,45 @@ def analyze_transcript(text, video_title, debug=False):
                 log(f"Error analyzing with Gemini: {e}", debug)
                 print(f"Error analyzing with Gemini: {e}")
                 break
-    return []
+    if rate_limited:
+        raise RateLimitError(f"Gemini rate limit persisted after {max_retries} attempts")
+    return None
+
+def analyze_transcript(text, video_title, debug=False):
+    try:
+        return request_recommendations(text, video_title, debug) or []
+    except RateLimitError as e:
+        print(f"Error analyzing with Gemini: {e}")
+        return []
+
+def append_history(recommendations, path=None):
+    """
+    Append recommendations to the JSON Lines history used by backtest_speakers.py.
+    Videos already in the history are skipped: the daily lookback window overlaps
+    the previous run, and the watch daemon may record the same uploads.
+    """
+    path = path or HISTORY_PATH
+    if not recommendations:
+        return
+    seen = set()
+    if os.path.exists(path):
+        with open(path, 'r', encoding='utf-8') as f:
+            for line in f:
+                if line.strip():
+                    seen.add(json.loads(line).get('video_id'))
+    new_recs = [r for r in recommendations if r.get('video_id') not in seen]
+    if not new_recs:
+        return
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+    with open(path, 'a', encoding='utf-8') as f:
+        for r in new_recs:
+            f.write(json.dumps(r, ensure_ascii=False) + "\n")
 
 def main():
+    force_utf8_output()
     parser = argparse.ArgumentParser(description='Extract recommendations from transcripts.')
+    parser.add_argument('--history', default=HISTORY_PATH, help='JSON Lines file that accumulates every run for backtesting')
+    parser.add_argument('--index', default=transcript_index.INDEX_PATH, help='SQLite full-text index for transcripts')
     parser.add_argument('--debug', action='store_true', help='Enable debug logging')
     args = parser.parse_args()
     debug = args.debug
@@ -100,13 +162,15 @@ def main():
     log("Script started.", debug)
 
     if not os.path.exists('.tmp/videos.json'):
-        print("No videos found. Run get_recent_videos.py first.")
+        print("No videos found. Run python -m execution.get_recent_videos first.")
         return
 
     log("Reading .tmp/videos.json...", debug)
     with open('.tmp/videos.json', 'r', encoding='utf-8') as f:
         videos = json.load(f)
 
+    index_conn = transcript_index.connect(args.index)
+
     all_recommendations = []
     log(f"Found {len(videos)} videos to process.", debug)
     
@@ -116,7 +180,10 @@ def main():
     # Process only top 20 videos to be safe with quota
     for video in videos[:20]:
         print(f"Processing {video['title']}...")
-        transcript = get_transcript(video['id'], debug)
+        segments = get_transcript_segments(video['id'], debug)
+        transcript = join_segments(segments)
+        if segments:
+            transcript_index.add_transcript(index_conn, video, segments, debug)
         
         analysis_input = ""
         input_type = ""
@@ -137,6 +204,8 @@ def main():
                 r['video_title'] = video['title']
                 r['video_id'] = video['id']
                 r['source_type'] = input_type
+                r['channel_title'] = video.get('channelTitle')
+                r['published_at'] = video.get('publishedAt')
                 all_recommendations.append(r)
         else:
             print(f"  - No recommendations found in {input_type}.")
@@ -144,12 +213,16 @@ def main():
         # Consistent delay to avoid 429
         time.sleep(15)
 
+    index_conn.close()
+
     # Output results
     log("Writing results to .tmp/analysis_results.json...", debug)
     os.makedirs('.tmp', exist_ok=True)
     with open('.tmp/analysis_results.json', 'w', encoding='utf-8') as f:
         json.dump(all_recommendations, f, ensure_ascii=False, indent=2)
     
+    append_history(all_recommendations, args.history)
+
     print(f"Total recommendations saved: {len(all_recommendations)}")
     log("Script finished.", debug)
 
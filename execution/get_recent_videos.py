@@ -1,25 +1,32 @@
 import os
-import sys
 import datetime
 import json
 import argparse
 
-# Force UTF-8 encoding for stdout/stderr
-sys.stdout.reconfigure(encoding='utf-8')
-sys.stderr.reconfigure(encoding='utf-8')
-from googleapiclient.discovery import build
-from google.oauth2.credentials import Credentials
-from google_auth_oauthlib.flow import InstalledAppFlow
-from google.auth.transport.requests import Request
+from .common import force_utf8_output
 
 # Define scopes
 SCOPES = ['https://www.googleapis.com/auth/youtube.readonly']
 
+SEARCH_QUERIES = ["삼프로TV", "언더스탠딩", "와이스트릿"]
+ALLOWED_KEYWORDS = ["삼프로", "언더스탠딩", "와이스트릿"]
+BLACKLIST_KEYWORDS = ["하나님 나라", "Hacks Hub", "Smart English"]
+
 def log(msg, debug=False):
     if debug:
         print(f"[DEBUG] {msg}")
 
+def is_target_channel(channel_title):
+    is_target = any(k in channel_title for k in ALLOWED_KEYWORDS)
+    is_blacklisted = any(k in channel_title for k in BLACKLIST_KEYWORDS)
+    return is_target and not is_blacklisted
+
 def get_service(debug=False):
+    from googleapiclient.discovery import build
+    from google.oauth2.credentials import Credentials
+    from google_auth_oauthlib.flow import InstalledAppFlow
+    from google.auth.transport.requests import Request
+
     log("Initializing YouTube Service...", debug)
     creds = None
     if os.path.exists('token_youtube.json'):
@@ -39,24 +46,11 @@ def get_service(debug=False):
 
     return build('youtube', 'v3', credentials=creds)
 
-def main():
-    parser = argparse.ArgumentParser(description='Fetch recent YouTube videos.')
-    parser.add_argument('--debug', action='store_true', help='Enable debug logging')
-    args = parser.parse_args()
-    debug = args.debug
-
-    service = get_service(debug)
-
-    now = datetime.datetime.now(datetime.timezone.utc)
-    published_after = (now - datetime.timedelta(hours=48)).isoformat().replace("+00:00", "Z")
-    published_before = (now - datetime.timedelta(hours=6)).isoformat().replace("+00:00", "Z")
-
-    search_queries = ["삼프로TV", "언더스탠딩", "와이스트릿"]
-    
+def search_video_ids(service, published_after, published_before, debug=False):
     found_video_ids = []
     seen_ids = set()
 
-    for query in search_queries:
+    for query in SEARCH_QUERIES:
         print(f"Searching for '{query}' videos...")
         try:
             request = service.search().list(
@@ -69,30 +63,65 @@ def main():
                 order="date"
             )
             response = request.execute()
-            
-            allowed_keywords = ["삼프로", "언더스탠딩", "와이스트릿"]
-            blacklist_keywords = ["하나님 나라", "Hacks Hub", "Smart English"]
 
             for item in response.get('items', []):
                 video_id = item['id']['videoId']
                 channel_title = item['snippet']['channelTitle']
                 
-                is_target = any(k in channel_title for k in allowed_keywords)
-                is_blacklisted = any(k in channel_title for k in blacklist_keywords)
-                
-                if video_id not in seen_ids and is_target and not is_blacklisted:
+                if video_id not in seen_ids and is_target_channel(channel_title):
                     found_video_ids.append(video_id)
                     seen_ids.add(video_id)
         except Exception as e:
             print(f"Error searching for {query}: {e}")
+    return found_video_ids
 
-    # Fetch detailed info for all found videos
+def resolve_upload_playlists(service, debug=False):
+    """
+    Map each target channel to its uploads playlist. Polling playlistItems costs
+    1 quota unit per call versus 100 for search, which makes frequent polling
+    affordable.
+    """
+    channel_ids = []
+    for query in SEARCH_QUERIES:
+        try:
+            response = service.search().list(part="snippet", q=query, type="channel", maxResults=5).execute()
+            for item in response.get('items', []):
+                channel_id = item['snippet']['channelId']
+                if channel_id not in channel_ids and is_target_channel(item['snippet']['channelTitle']):
+                    channel_ids.append(channel_id)
+        except Exception as e:
+            print(f"Error resolving channel for {query}: {e}")
+
+    playlists = {}
+    for i in range(0, len(channel_ids), 50):
+        response = service.channels().list(part="snippet,contentDetails", id=",".join(channel_ids[i:i+50])).execute()
+        for item in response.get('items', []):
+            uploads = item['contentDetails']['relatedPlaylists']['uploads']
+            playlists[uploads] = item['snippet']['title']
+            log(f"Watching uploads of {item['snippet']['title']} ({uploads})", debug)
+    return playlists
+
+def list_recent_uploads(service, playlist_ids, published_after, debug=False):
+    video_ids = []
+    for playlist_id in playlist_ids:
+        try:
+            response = service.playlistItems().list(part="contentDetails", playlistId=playlist_id, maxResults=10).execute()
+            for item in response.get('items', []):
+                details = item['contentDetails']
+                if details.get('videoPublishedAt', '') >= published_after and details['videoId'] not in video_ids:
+                    video_ids.append(details['videoId'])
+        except Exception as e:
+            print(f"Error listing uploads for {playlist_id}: {e}")
+    log(f"Found {len(video_ids)} recent uploads.", debug)
+    return video_ids
+
+def fetch_video_details(service, video_ids, debug=False):
     videos = []
-    if found_video_ids:
-        print(f"Fetching details for {len(found_video_ids)} videos...")
+    if video_ids:
+        print(f"Fetching details for {len(video_ids)} videos...")
         # Process in batches of 50 (API limit)
-        for i in range(0, len(found_video_ids), 50):
-            batch_ids = found_video_ids[i:i+50]
+        for i in range(0, len(video_ids), 50):
+            batch_ids = video_ids[i:i+50]
             try:
                 request = service.videos().list(
                     part="snippet,contentDetails,topicDetails",
@@ -112,6 +141,23 @@ def main():
                     })
             except Exception as e:
                 print(f"Error fetching details: {e}")
+    return videos
+
+def main():
+    force_utf8_output()
+    parser = argparse.ArgumentParser(description='Fetch recent YouTube videos.')
+    parser.add_argument('--debug', action='store_true', help='Enable debug logging')
+    args = parser.parse_args()
+    debug = args.debug
+
+    service = get_service(debug)
+
+    now = datetime.datetime.now(datetime.timezone.utc)
+    published_after = (now - datetime.timedelta(hours=48)).isoformat().replace("+00:00", "Z")
+    published_before = (now - datetime.timedelta(hours=6)).isoformat().replace("+00:00", "Z")
+
+    found_video_ids = search_video_ids(service, published_after, published_before, debug)
+    videos = fetch_video_details(service, found_video_ids, debug)
 
     os.makedirs('.tmp', exist_ok=True)
     with open('.tmp/videos.json', 'w', encoding='utf-8') as f:
@@ -2,23 +2,33 @@ import os
 import sys
 import base64
 import json
-from email.mime.text import MIMEText
-from googleapiclient.discovery import build
-from google.oauth2.credentials import Credentials
-from google_auth_oauthlib.flow import InstalledAppFlow
-from google.auth.transport.requests import Request
+import html
+import time
+import argparse
 
-from dotenv import load_dotenv
+from . import consolidate_recommendations
+from .common import force_utf8_output
 
-# Force UTF-8 encoding for stdout/stderr
-sys.stdout.reconfigure(encoding='utf-8')
-sys.stderr.reconfigure(encoding='utf-8')
+SCOPES = ['https://www.googleapis.com/auth/gmail.compose']
 
-load_dotenv()
+# Gmail recommends keeping batch requests at or below 50 calls
+BATCH_SIZE = 50
 
-SCOPES = ['https://www.googleapis.com/auth/gmail.compose']
+# Each send costs 100 quota units, so large batches hit 429 rateLimitExceeded;
+# those and 5xx responses are resent in new batches with exponential backoff
+MAX_SEND_ATTEMPTS = 4
+RETRY_BACKOFF_SECONDS = 10
+
+def log(msg, debug=False):
+    if debug:
+        print(f"[DEBUG] {msg}")
 
 def get_service():
+    from googleapiclient.discovery import build
+    from google.oauth2.credentials import Credentials
+    from google_auth_oauthlib.flow import InstalledAppFlow
+    from google.auth.transport.requests import Request
+
     creds = None
     if os.path.exists('token_email.json'):
         try:
@@ -35,7 +45,170 @@ def get_service():
             token.write(creds.to_json())
     return build('gmail', 'v1', credentials=creds)
 
+def stock_key(name, aliases):
+    # Same normalization and tickers.json aliases as the slide consolidation,
+    # so a watchlist entry "NVDA" matches "엔비디아" or "NVIDIA Corp."
+    key = consolidate_recommendations.normalize_stock(name)
+    return aliases.get(key, key)
+
+def load_recipients(path, aliases=None, debug=False):
+    """
+    Collect recipients from RECIPIENT_EMAIL (comma-separated) and an optional
+    JSON file. File entries are either plain addresses or objects of the form
+    {"email": "...", "watchlist": ["삼성전자", "NVDA"]}. Addresses are
+    de-duplicated case-insensitively; a recipient without a watchlist gets
+    every recommendation. Watchlist names are resolved through data/tickers.json.
+    """
+    aliases = aliases or {}
+    entries = []
+    env_value = os.environ.get('RECIPIENT_EMAIL', '')
+    entries.extend(e.strip() for e in env_value.split(',') if e.strip())
+
+    if path and os.path.exists(path):
+        log(f"Loading recipients from {path}...", debug)
+        with open(path, 'r', encoding='utf-8') as f:
+            entries.extend(json.load(f))
+
+    recipients = {}
+    for entry in entries:
+        if isinstance(entry, str):
+            entry = {'email': entry}
+        email = (entry.get('email') or '').strip()
+        if not email:
+            continue
+        key = email.lower()
+        watchlist = entry.get('watchlist') or []
+        if key in recipients:
+            # Merge watchlists; an unfiltered subscription wins over a filtered one
+            existing = recipients[key]['watchlist']
+            if existing is None or not watchlist:
+                recipients[key]['watchlist'] = None
+            else:
+                existing.update(stock_key(s, aliases) for s in watchlist)
+            continue
+        recipients[key] = {
+            'email': email,
+            'watchlist': {stock_key(s, aliases) for s in watchlist} if watchlist else None,
+        }
+    return list(recipients.values())
+
+def escape_field(item, key, default=''):
+    # Gemini JSON often carries explicit nulls, which .get(key, default) lets through
+    return html.escape(str(item.get(key) or default))
+
+def render_digest(slide_url, slide_title, items):
+    rows = []
+    for item in items:
+        market = f"[{escape_field(item, 'market')}]" if item.get('market') else ""
+        rows.append(
+            "<tr>"
+            f"<td>{escape_field(item, 'stock_name', 'N/A')} {market}</td>"
+            f"<td>{escape_field(item, 'action', 'N/A')}</td>"
+            f"<td>{escape_field(item, 'speaker', 'Analyst')}</td>"
+            f"<td>{escape_field(item, 'reasoning')}</td>"
+            "</tr>"
+        )
+    if rows:
+        table = (
+            "<table border='1' cellpadding='4' cellspacing='0'>"
+            "<tr><th>Stock</th><th>Action</th><th>Speaker</th><th>Reasoning</th></tr>"
+            + "".join(rows) + "</table>"
+        )
+    else:
+        table = "<p>No recommendations found.</p>"
+    return (
+        f"<h2>{html.escape(slide_title or 'Stock Analysis')}</h2>"
+        f"<p>Here is your stock analysis from 3pro TV: "
+        f"<a href='{html.escape(str(slide_url))}'>{html.escape(str(slide_url))}</a></p>"
+        + table
+    )
+
+def build_messages(recipients, recommendations, slide_url, slide_title, aliases=None):
+    """Render one digest per distinct watchlist and address it to every matching recipient."""
+    from email.mime.multipart import MIMEMultipart
+    from email.mime.text import MIMEText
+
+    aliases = aliases or {}
+    rendered = {}
+    messages = []
+    for r in recipients:
+        key = frozenset(r['watchlist']) if r['watchlist'] is not None else None
+        if key not in rendered:
+            if key is None:
+                items = recommendations
+            else:
+                items = [rec for rec in recommendations if stock_key(rec.get('stock_name'), aliases) in key]
+            plain = f"Here is your stock analysis from 3pro TV: {slide_url}"
+            rendered[key] = (plain, render_digest(slide_url, slide_title, items))
+        plain, body = rendered[key]
+
+        message = MIMEMultipart('alternative')
+        message['to'] = r['email']
+        message['subject'] = f"Stock Analysis: {slide_title}"
+        message.attach(MIMEText(plain, 'plain', 'utf-8'))
+        message.attach(MIMEText(body, 'html', 'utf-8'))
+        messages.append((r['email'], {'raw': base64.urlsafe_b64encode(message.as_bytes()).decode()}))
+    return messages
+
+def is_retryable(exception):
+    status = getattr(getattr(exception, 'resp', None), 'status', None)
+    return status is not None and (int(status) == 429 or int(status) >= 500)
+
+def send_batched(service, messages, debug=False):
+    """
+    Send (email, body) pairs in batches of BATCH_SIZE. Messages that fail with
+    429 or 5xx (or whose whole batch failed) are retried up to MAX_SEND_ATTEMPTS
+    times. Returns (sent, failed) lists of (email, message id or exception).
+    """
+    sent, failed = [], []
+    pending = list(messages)
+    for attempt in range(MAX_SEND_ATTEMPTS):
+        if attempt:
+            wait_time = RETRY_BACKOFF_SECONDS * 2 ** (attempt - 1)
+            print(f"Retrying {len(pending)} messages in {wait_time}s (attempt {attempt + 1}/{MAX_SEND_ATTEMPTS})...")
+            time.sleep(wait_time)
+        last_attempt = attempt == MAX_SEND_ATTEMPTS - 1
+        bodies = dict(pending)
+        retry = []
+
+        def callback(request_id, response, exception):
+            if exception is None:
+                sent.append((request_id, response.get('id')))
+            elif is_retryable(exception) and not last_attempt:
+                retry.append((request_id, bodies[request_id]))
+            else:
+                failed.append((request_id, exception))
+
+        for i in range(0, len(pending), BATCH_SIZE):
+            chunk = pending[i:i + BATCH_SIZE]
+            log(f"Sending batch {i // BATCH_SIZE + 1} ({len(chunk)} messages)...", debug)
+            batch = service.new_batch_http_request(callback=callback)
+            for email, body in chunk:
+                batch.add(service.users().messages().send(userId="me", body=body), request_id=email)
+            try:
+                batch.execute()
+            except Exception as e:
+                if last_attempt:
+                    failed.extend((email, e) for email, _ in chunk)
+                else:
+                    retry.extend(chunk)
+        pending = retry
+        if not pending:
+            break
+    return sent, failed
+
 def main():
+    force_utf8_output()
+    parser = argparse.ArgumentParser(description='Send the report to all recipients.')
+    parser.add_argument('--recipients', default='recipients.json', help='JSON file with recipients and optional watchlists')
+    parser.add_argument('--tickers', default=consolidate_recommendations.TICKERS_PATH, help='JSON map of stock name to ticker for matching watchlists')
+    parser.add_argument('--debug', action='store_true', help='Enable debug logging')
+    args = parser.parse_args()
+    debug = args.debug
+
+    from dotenv import load_dotenv
+    load_dotenv()
+
     if not os.path.exists('.tmp/slide_link.json'):
         print("No slide link found.")
         return
@@ -49,25 +222,28 @@ def main():
         print("No URL in slide_link.json")
         return
 
-    recipient = os.environ.get('RECIPIENT_EMAIL')
-    if not recipient:
-        print("RECIPIENT_EMAIL not set in environment.")
-        recipient = input("Enter recipient email: ")
-        if not recipient:
-            return
+    aliases = consolidate_recommendations.load_aliases(args.tickers)
+    recipients = load_recipients(args.recipients, aliases, debug)
+    if not recipients:
+        print("No recipients configured. Set RECIPIENT_EMAIL or provide a recipients file.")
+        return
 
-    service = get_service()
+    recommendations = []
+    if os.path.exists('.tmp/analysis_results.json'):
+        with open('.tmp/analysis_results.json', 'r', encoding='utf-8') as f:
+            recommendations = json.load(f)
 
-    message = MIMEText(f"Here is your stock analysis from 3pro TV: {slide_url}")
-    message['to'] = recipient
-    message['subject'] = f"Stock Analysis: {slide_title}"
-    create_message = {'raw': base64.urlsafe_b64encode(message.as_bytes()).decode()}
+    messages = build_messages(recipients, recommendations, slide_url, slide_title, aliases)
+    log(f"Prepared {len(messages)} messages.", debug)
+
+    service = get_service()
+    sent, failed = send_batched(service, messages, debug)
 
-    try:
-        message = (service.users().messages().send(userId="me", body=create_message).execute())
-        print(f"Email sent. Message Id: {message['id']}")
-    except Exception as e:
-        print(f"An error occurred sending email: {e}")
+    print(f"Emails sent: {len(sent)}, failed: {len(failed)}")
+    for email, e in failed:
+        print(f"An error occurred sending email to {email}: {e}")
+    if failed:
+        sys.exit(1)
 
 if __name__ == "__main__":
     main()
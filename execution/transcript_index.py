@@ -0,0 +1,158 @@
+import os
+import json
+import sqlite3
+import argparse
+
+from .common import force_utf8_output
+
+INDEX_PATH = 'data/transcripts.db'
+
+# The trigram tokenizer indexes every 3-character window, which works for
+# Hangeul (no morphological analysis needed) as well as tickers. Terms shorter
+# than 3 characters cannot use it, so they go to a word-level table queried by
+# prefix: Korean particles are suffixes, so "금리*" also finds 금리가 and 금리는.
+MIN_TERM_LENGTH = 3
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS videos (
+    video_id TEXT PRIMARY KEY,
+    title TEXT,
+    channel_title TEXT,
+    published_at TEXT,
+    indexed_at TEXT DEFAULT CURRENT_TIMESTAMP
+);
+CREATE VIRTUAL TABLE IF NOT EXISTS segments USING fts5(
+    text,
+    video_id UNINDEXED,
+    start UNINDEXED,
+    tokenize = 'trigram'
+);
+CREATE VIRTUAL TABLE IF NOT EXISTS segment_words USING fts5(
+    text,
+    tokenize = 'unicode61'
+);
+"""
+
+def log(msg, debug=False):
+    if debug:
+        print(f"[DEBUG] {msg}")
+
+def connect(path=INDEX_PATH):
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+    conn = sqlite3.connect(path)
+    conn.executescript(SCHEMA)
+    return conn
+
+def is_indexed(conn, video_id):
+    return conn.execute("SELECT 1 FROM videos WHERE video_id = ?", (video_id,)).fetchone() is not None
+
+def add_transcript(conn, video, segments, debug=False):
+    """
+    Store a video's transcript segments. Videos already in the index are
+    skipped, so each run only adds what is new. Returns True if rows were added.
+    """
+    if not segments or is_indexed(conn, video['id']):
+        return False
+    with conn:
+        conn.execute(
+            "INSERT INTO videos (video_id, title, channel_title, published_at) VALUES (?, ?, ?, ?)",
+            (video['id'], video.get('title'), video.get('channelTitle'), video.get('publishedAt')),
+        )
+        # Both tables share rowids so short-term lookups can join back to segments
+        base = conn.execute("SELECT coalesce(max(rowid), 0) + 1 FROM segments").fetchone()[0]
+        rows = [(base + i, s['text'], video['id'], int(s['start'])) for i, s in enumerate(segments)]
+        conn.executemany("INSERT INTO segments (rowid, text, video_id, start) VALUES (?, ?, ?, ?)", rows)
+        conn.executemany("INSERT INTO segment_words (rowid, text) VALUES (?, ?)", ((r[0], r[1]) for r in rows))
+    log(f"Indexed {len(segments)} segments for {video['id']}", debug)
+    return True
+
+def deep_link(video_id, start):
+    return f"https://youtu.be/{video_id}?t={int(start)}"
+
+def search(conn, query, since=None, channel=None, match_any=False, limit=20):
+    terms = [t for t in query.split() if t]
+    if not terms:
+        return []
+    indexed = [t for t in terms if len(t) >= MIN_TERM_LENGTH]
+    short = [t for t in terms if len(t) < MIN_TERM_LENGTH]
+
+    if match_any and short:
+        # FTS5 MATCH cannot be OR-ed with other conditions, so look every term up by prefix
+        short, indexed = terms, []
+
+    conditions, params = [], []
+    if indexed:
+        conditions.append("segments MATCH ?")
+        joiner = " OR " if match_any else " AND "
+        params.append(joiner.join('"' + t.replace('"', '""') + '"' for t in indexed))
+    if short:
+        conditions.append("segments.rowid IN (SELECT rowid FROM segment_words WHERE segment_words MATCH ?)")
+        joiner = " OR " if match_any else " AND "
+        params.append(joiner.join('"' + t.replace('"', '""') + '"*' for t in short))
+    if since:
+        conditions.append("v.published_at >= ?")
+        params.append(since)
+    if channel:
+        conditions.append("v.channel_title LIKE ?")
+        params.append(f"%{channel}%")
+
+    # snippet() is only valid when the row was found through MATCH
+    uses_match = bool(indexed)
+    snippet = "snippet(segments, 0, '[', ']', '…', 16)" if uses_match else "substr(segments.text, 1, 120)"
+    order = "ORDER BY rank, v.published_at DESC" if uses_match else "ORDER BY v.published_at DESC"
+
+    sql = f"""
+        SELECT segments.video_id, segments.start, {snippet}, v.title, v.channel_title, v.published_at
+        FROM segments JOIN videos v ON v.video_id = segments.video_id
+        WHERE {' AND '.join(conditions)}
+        {order}
+        LIMIT ?
+    """
+    params.append(limit)
+    return [
+        {
+            'video_id': video_id,
+            'start': start,
+            'snippet': snippet_text,
+            'title': title,
+            'channel_title': channel_title,
+            'published_at': published_at,
+            'url': deep_link(video_id, start),
+        }
+        for video_id, start, snippet_text, title, channel_title, published_at in conn.execute(sql, params)
+    ]
+
+def main():
+    force_utf8_output()
+    parser = argparse.ArgumentParser(description='Search the local transcript index.')
+    parser.add_argument('query', help='Whitespace-separated terms (all must match unless --any)')
+    parser.add_argument('--any', action='store_true', help='Match segments containing any of the terms')
+    parser.add_argument('--since', help='Only videos published on or after this date (YYYY-MM-DD)')
+    parser.add_argument('--channel', help='Only videos whose channel title contains this text')
+    parser.add_argument('--limit', type=int, default=20, help='Maximum number of snippets')
+    parser.add_argument('--index', default=INDEX_PATH, help='Path to the SQLite index')
+    parser.add_argument('--json', action='store_true', help='Print results as JSON')
+    args = parser.parse_args()
+
+    if not os.path.exists(args.index):
+        print(f"No transcript index found at {args.index}. Run python -m execution.extract_recommendations first.")
+        return
+
+    conn = connect(args.index)
+    results = search(conn, args.query, args.since, args.channel, args.any, args.limit)
+    conn.close()
+
+    if args.json:
+        print(json.dumps(results, ensure_ascii=False, indent=2))
+        return
+    if not results:
+        print("No matches.")
+        return
+    for r in results:
+        minutes, seconds = divmod(int(r['start']), 60)
+        print(f"{(r['published_at'] or '')[:10]} [{r['channel_title']}] {r['title']}")
+        print(f"  {minutes:02d}:{seconds:02d} {r['snippet']}")
+        print(f"  {r['url']}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,266 @@
+import os
+import sys
+import json
+import time
+import datetime
+import argparse
+import threading
+
+from . import get_recent_videos
+from . import extract_recommendations
+from . import create_slides
+from . import transcript_index
+from .common import force_utf8_output
+
+STATE_PATH = '.tmp/daemon_state.json'
+
+def log(msg, debug=False):
+    if debug:
+        print(f"[DEBUG] {msg}")
+
+def utc_now():
+    return datetime.datetime.now(datetime.timezone.utc)
+
+def to_rfc3339(dt):
+    return dt.isoformat().replace("+00:00", "Z")
+
+def parse_rfc3339(value):
+    return datetime.datetime.fromisoformat(value.replace("Z", "+00:00"))
+
+class Metrics:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.started_at = utc_now()
+        self.values = {
+            'polls': 0,
+            'poll_errors': 0,
+            'videos_processed': 0,
+            'videos_pending': 0,
+            'analysis_errors': 0,
+            'videos_skipped': 0,
+            'recommendations': 0,
+            'slides_appended': 0,
+            'last_poll_at': None,
+            'last_poll_seconds': None,
+            'last_latency_seconds': None,
+        }
+
+    def inc(self, key, amount=1):
+        with self.lock:
+            self.values[key] += amount
+
+    def set(self, key, value):
+        with self.lock:
+            self.values[key] = value
+
+    def snapshot(self):
+        with self.lock:
+            data = dict(self.values)
+        data['uptime_seconds'] = round((utc_now() - self.started_at).total_seconds(), 1)
+        return data
+
+def start_health_server(metrics, port, interval):
+    from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            data = metrics.snapshot()
+            if self.path == '/health':
+                last = data['last_poll_at']
+                # Healthy while polls keep landing within two intervals
+                healthy = last is None or (utc_now() - parse_rfc3339(last)).total_seconds() < interval * 2 + 60
+                body = {'status': 'ok' if healthy else 'stale', 'last_poll_at': last}
+                code = 200 if healthy else 503
+            elif self.path == '/metrics':
+                body, code = data, 200
+            else:
+                body, code = {'error': 'not found'}, 404
+            payload = json.dumps(body).encode('utf-8')
+            self.send_response(code)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(payload)))
+            self.end_headers()
+            self.wfile.write(payload)
+
+        def log_message(self, format, *args):
+            pass
+
+    server = ThreadingHTTPServer(('127.0.0.1', port), Handler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    print(f"Health endpoint listening on http://127.0.0.1:{port}/health")
+    return server
+
+def load_state():
+    if os.path.exists(STATE_PATH):
+        with open(STATE_PATH, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    return {'date': None, 'summary_id': None, 'processed': [], 'failures': {}}
+
+def save_state(state):
+    os.makedirs('.tmp', exist_ok=True)
+    tmp_path = STATE_PATH + '.tmp'
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(state, f, ensure_ascii=False, indent=2)
+    os.replace(tmp_path, STATE_PATH)
+
+def analyze_video(video, transcript, debug=False):
+    if transcript:
+        analysis_input = f"Transcript: {transcript}"
+        input_type = "Transcript"
+    else:
+        tags_str = ", ".join(video.get('tags', []))
+        analysis_input = f"Title: {video.get('title', '')}\nTags: {tags_str}\nDescription: {video.get('description', '')}"
+        input_type = "Tags/Description"
+
+    recs = extract_recommendations.request_recommendations(analysis_input, video['title'], debug)
+    if recs is None:
+        return None
+    for r in recs:
+        r['video_title'] = video['title']
+        r['video_id'] = video['id']
+        r['source_type'] = input_type
+        r['channel_title'] = video.get('channelTitle')
+        r['published_at'] = video.get('publishedAt')
+    return recs
+
+def poll_once(youtube, slides, drive, index_conn, playlists, state, metrics, args):
+    debug = args.debug
+    now = utc_now()
+    today = datetime.datetime.now().strftime("%Y-%m-%d")
+    if state['date'] != today:
+        log(f"Starting new report day {today}.", debug)
+        state.update({'date': today, 'summary_id': None})
+        # Keep the processed list bounded to what the lookback window can still return
+        state['processed'] = state['processed'][-500:]
+
+    published_after = to_rfc3339(now - datetime.timedelta(hours=args.lookback_hours))
+    video_ids = get_recent_videos.list_recent_uploads(youtube, playlists, published_after, debug)
+    new_ids = [v for v in video_ids if v not in state['processed']]
+    videos = get_recent_videos.fetch_video_details(youtube, new_ids, debug) if new_ids else []
+
+    new_recs = []
+    done_ids = []
+    pending = 0
+    analyzed = 0
+    for video in videos:
+        segments = extract_recommendations.get_transcript_segments(video['id'], debug)
+        transcript = extract_recommendations.join_segments(segments)
+        if segments:
+            transcript_index.add_transcript(index_conn, video, segments, debug)
+        age_hours = (now - parse_rfc3339(video['publishedAt'])).total_seconds() / 3600
+        if not transcript and age_hours < args.transcript_wait_hours:
+            # Captions usually appear within a few hours; retry on the next poll
+            log(f"Transcript not ready for {video['id']} ({age_hours:.1f}h old).", debug)
+            pending += 1
+            continue
+
+        if analyzed:
+            # Same spacing as extract_recommendations.main to stay clear of 429s
+            time.sleep(args.analysis_delay)
+        analyzed += 1
+
+        print(f"Processing {video['title']}...")
+        try:
+            recs = analyze_video(video, transcript, debug)
+        except extract_recommendations.RateLimitError as e:
+            # Every later video would hit the same limit; retry them all next poll
+            print(f"  - {e}. Stopping this poll.")
+            metrics.inc('analysis_errors')
+            break
+        if recs is None:
+            # Bad JSON, a safety block or an oversized prompt: move on so one
+            # video cannot hold back the rest, and give up after a few polls
+            metrics.inc('analysis_errors')
+            attempts = state['failures'].get(video['id'], 0) + 1
+            if attempts >= args.max_attempts:
+                print(f"  - Analysis failed {attempts} times for {video['id']}. Skipping it.")
+                state['failures'].pop(video['id'], None)
+                metrics.inc('videos_skipped')
+                done_ids.append(video['id'])
+            else:
+                print(f"  - Analysis failed for {video['id']} (attempt {attempts}/{args.max_attempts}). Will retry next poll.")
+                state['failures'][video['id']] = attempts
+            continue
+        state['failures'].pop(video['id'], None)
+        done_ids.append(video['id'])
+        if recs:
+            print(f"  - Found {len(recs)} recommendations.")
+            new_recs.extend(recs)
+            metrics.set('last_latency_seconds', round((utc_now() - parse_rfc3339(video['publishedAt'])).total_seconds()))
+    metrics.set('videos_pending', pending)
+
+    # Videos are only marked processed once their recommendations are in the
+    # history and on the deck; a failure below leaves them for the next poll
+    if new_recs:
+        extract_recommendations.append_history(new_recs)
+        presentation_id = create_slides.find_or_create_presentation(slides, drive, debug)
+        if not state['summary_id']:
+            state['summary_id'] = create_slides.add_summary_slide(slides, presentation_id, datetime.datetime.now(), 'Live - updating as new videos arrive', debug)
+            create_slides.apply_retention(slides, presentation_id, debug)
+            # Persist right away so a failed append below never creates a second summary
+            save_state(state)
+        appended = create_slides.append_video_slides(slides, presentation_id, new_recs, state['summary_id'], datetime.datetime.now(), debug)
+        create_slides.save_link(presentation_id)
+        metrics.inc('recommendations', len(new_recs))
+        metrics.inc('slides_appended', len(appended))
+
+    state['processed'].extend(done_ids)
+    # Forget failure counts for videos that have left the lookback window
+    state['failures'] = {v: n for v, n in state['failures'].items() if v in video_ids}
+    metrics.inc('videos_processed', len(done_ids))
+    save_state(state)
+
+def main():
+    force_utf8_output()
+    parser = argparse.ArgumentParser(description='Watch target channels and append new uploads to the daily report.')
+    parser.add_argument('--interval', type=int, default=600, help='Seconds between polls')
+    parser.add_argument('--lookback-hours', type=float, default=24, help='Only consider uploads newer than this')
+    parser.add_argument('--transcript-wait-hours', type=float, default=6, help='Fall back to tags/description after waiting this long for a transcript')
+    parser.add_argument('--analysis-delay', type=float, default=15, help='Seconds to wait between Gemini requests')
+    parser.add_argument('--max-attempts', type=int, default=3, help='Skip a video after this many failed Gemini analyses')
+    parser.add_argument('--port', type=int, default=8765, help='Port for the local health/metrics endpoint')
+    parser.add_argument('--once', action='store_true', help='Run a single poll and exit')
+    parser.add_argument('--debug', action='store_true', help='Enable debug logging')
+    args = parser.parse_args()
+    debug = args.debug
+
+    # Build every client once and keep it warm for the lifetime of the daemon
+    extract_recommendations.get_client()
+    youtube = get_recent_videos.get_service(debug)
+    slides, drive = create_slides.get_services(debug)
+    index_conn = transcript_index.connect()
+    playlists = get_recent_videos.resolve_upload_playlists(youtube, debug)
+    if not playlists:
+        print("No target channels resolved. Exiting.")
+        sys.exit(1)
+
+    metrics = Metrics()
+    server = None if args.once else start_health_server(metrics, args.port, args.interval)
+    state = load_state()
+    state.pop('recommendations', None)
+    state.setdefault('failures', {})
+
+    try:
+        while True:
+            started = time.monotonic()
+            try:
+                poll_once(youtube, slides, drive, index_conn, playlists, state, metrics, args)
+            except Exception as e:
+                print(f"Error during poll: {e}")
+                metrics.inc('poll_errors')
+            metrics.inc('polls')
+            metrics.set('last_poll_at', to_rfc3339(utc_now()))
+            metrics.set('last_poll_seconds', round(time.monotonic() - started, 2))
+            if args.once:
+                break
+            time.sleep(max(0, args.interval - (time.monotonic() - started)))
+    except KeyboardInterrupt:
+        print("Stopping watch daemon.")
+    finally:
+        if server:
+            server.shutdown()
+        index_conn.close()
+
+if __name__ == "__main__":
+    main()
@@ -2,28 +2,34 @@
 # This script executes the following steps in order.
 
 Write-Host "Step 1: Fetching recent YouTube videos..." -ForegroundColor Cyan
-python execution/get_recent_videos.py
+python -m execution.get_recent_videos
 if ($LASTEXITCODE -ne 0) {
     Write-Host "Error in Step 1. Exiting." -ForegroundColor Red
     exit $LASTEXITCODE
 }
 
 Write-Host "Step 2: Extracting recommendations using Gemini AI..." -ForegroundColor Cyan
-python execution/extract_recommendations.py
+python -m execution.extract_recommendations
 if ($LASTEXITCODE -ne 0) {
     Write-Host "Error in Step 2. Exiting." -ForegroundColor Red
     exit $LASTEXITCODE
 }
 
+Write-Host "Step 2b: Scoring speaker track records..." -ForegroundColor Cyan
+python -m execution.backtest_speakers
+if ($LASTEXITCODE -ne 0) {
+    Write-Host "Warning: backtest failed. Continuing without track records." -ForegroundColor Yellow
+}
+
 Write-Host "Step 3: Creating/Updating Google Slides..." -ForegroundColor Cyan
-python execution/create_slides.py
+python -m execution.create_slides
 if ($LASTEXITCODE -ne 0) {
     Write-Host "Error in Step 3. Exiting." -ForegroundColor Red
     exit $LASTEXITCODE
 }
 
 Write-Host "Step 4: Sending email report..." -ForegroundColor Cyan
-python execution/send_email.py
+python -m execution.send_email
 if ($LASTEXITCODE -ne 0) {
     Write-Host "Error in Step 4. Exiting." -ForegroundColor Red
     exit $LASTEXITCODE
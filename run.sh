@@ -8,28 +8,34 @@
 # 4. Send the slide link via email
 
 echo "Step 1: Fetching recent YouTube videos..."
-python execution/get_recent_videos.py
+python -m execution.get_recent_videos
 if [ $? -ne 0 ]; then
     echo "Error in Step 1. Exiting."
     exit 1
 fi
 
 echo "Step 2: Extracting recommendations using Gemini AI..."
-python execution/extract_recommendations.py
+python -m execution.extract_recommendations
 if [ $? -ne 0 ]; then
     echo "Error in Step 2. Exiting."
     exit 1
 fi
 
+echo "Step 2b: Scoring speaker track records..."
+python -m execution.backtest_speakers
+if [ $? -ne 0 ]; then
+    echo "Warning: backtest failed. Continuing without track records."
+fi
+
 echo "Step 3: Creating/Updating Google Slides..."
-python execution/create_slides.py
+python -m execution.create_slides
 if [ $? -ne 0 ]; then
     echo "Error in Step 3. Exiting."
     exit 1
 fi
 
 echo "Step 4: Sending email report..."
-python execution/send_email.py
+python -m execution.send_email
 if [ $? -ne 0 ]; then
     echo "Error in Step 4. Exiting."
     exit 1